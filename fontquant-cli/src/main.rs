@@ -1,7 +1,11 @@
 use std::{collections::BTreeSet, path::Path, str::FromStr};
 
 use clap::Parser;
-use fontquant_lib::{Results, run};
+use fontquant_lib::{
+    Results,
+    profile::{ProfileSettings, profile},
+    run,
+};
 use indicatif::ParallelProgressIterator;
 use rayon::iter::{IntoParallelRefIterator, ParallelIterator};
 use read_fonts::types::Tag;
@@ -13,8 +17,15 @@ struct Cli {
     #[arg(long)]
     csv: bool,
     fonts: Vec<String>,
-    #[arg(short, long, default_value = "", value_parser=parse_setting)]
+    #[arg(short, long, default_value = "", value_parser=parse_setting, conflicts_with = "profile")]
     location: std::vec::Vec<Setting<f32>>,
+    /// Sample the variable-aware metrics along each axis instead of measuring one location
+    #[arg(long)]
+    profile: bool,
+    /// Profile mode: refine wherever a metric strays further than this fraction of its range
+    /// from linear interpolation
+    #[arg(long, default_value_t = ProfileSettings::default().tolerance, requires = "profile", value_parser = parse_tolerance)]
+    tolerance: f64,
 }
 
 fn csv_escape(s: String) -> String {
@@ -25,13 +36,21 @@ fn csv_escape(s: String) -> String {
     }
 }
 
+/// Formats the values of `all_keys` in `results` as CSV cells, leaving missing ones empty
+fn metric_cells(results: &Results, all_keys: &[&str]) -> String {
+    all_keys
+        .iter()
+        .map(|name| {
+            results
+                .get(name)
+                .map(|m| csv_escape(m.1.to_string()))
+                .unwrap_or("".to_string())
+        })
+        .collect::<Vec<String>>()
+        .join(",")
+}
+
 fn print_line(font_file: &str, location: &[Setting<f32>], results: &Results, all_keys: &[&str]) {
-    let metrics = all_keys.iter().map(|name| {
-        results
-            .get(name)
-            .map(|m| csv_escape(m.1.to_string()))
-            .unwrap_or("".to_string())
-    });
     let loc_string = location
         .iter()
         .map(|s| format!("{}={}", s.selector, s.value))
@@ -41,7 +60,7 @@ fn print_line(font_file: &str, location: &[Setting<f32>], results: &Results, all
         "\"{}\",{:.2},{}",
         Path::new(font_file).file_name().unwrap().to_str().unwrap(),
         loc_string,
-        metrics.collect::<Vec<String>>().join(",")
+        metric_cells(results, all_keys)
     );
 }
 
@@ -68,8 +87,84 @@ fn parse_setting(s: &str) -> Result<Vec<Setting<f32>>, String> {
     Ok(settings)
 }
 
+fn parse_tolerance(s: &str) -> Result<f64, String> {
+    let tolerance: f64 = s.parse().map_err(|_| format!("Invalid tolerance: {}", s))?;
+    if !(tolerance.is_finite() && tolerance > 0.0) {
+        return Err(format!("Tolerance must be a positive number: {}", s));
+    }
+    Ok(tolerance)
+}
+
+fn print_profiles(args: &Cli) {
+    let settings = ProfileSettings {
+        tolerance: args.tolerance,
+        ..Default::default()
+    };
+    let all_profiles = args
+        .fonts
+        .par_iter()
+        .progress()
+        .map(|font| {
+            let font_data = std::fs::read(font).unwrap();
+            let fontref = skrifa::FontRef::new(&font_data).expect("Failed to parse font");
+            profile(&fontref, &settings).map(|profiles| (font, profiles))
+        })
+        .collect::<Result<Vec<_>, _>>()
+        .expect("Failed to profile metrics");
+    let all_keys: BTreeSet<&str> = all_profiles
+        .iter()
+        .flat_map(|(_, profiles)| profiles.iter())
+        .flat_map(|profile| profile.samples.iter())
+        .flat_map(|sample| sample.results.keys())
+        .collect();
+    let all_keys: Vec<&str> = all_keys.into_iter().collect();
+    if args.csv {
+        println!("Font,Axis,Position,{}", all_keys.join(","));
+    }
+    for (font, profiles) in all_profiles.iter() {
+        if !args.csv {
+            println!("Font: {}", font);
+        }
+        for profile in profiles {
+            if !args.csv {
+                println!(
+                    " {} ({}–{}, default {}): {} samples",
+                    profile.axis,
+                    profile.min,
+                    profile.max,
+                    profile.default,
+                    profile.samples.len()
+                );
+            }
+            for sample in profile.samples.iter() {
+                if args.csv {
+                    println!(
+                        "\"{}\",{},{},{}",
+                        Path::new(font).file_name().unwrap().to_str().unwrap(),
+                        profile.axis,
+                        sample.position,
+                        metric_cells(&sample.results, &all_keys)
+                    );
+                } else {
+                    println!("  {}={}:", profile.axis, sample.position);
+                    for (name, (_metric_key, value)) in sample.results.iter() {
+                        println!("   {}: {:?}", name, value);
+                    }
+                }
+            }
+        }
+        if !args.csv {
+            println!();
+        }
+    }
+}
+
 fn main() {
     let args = Cli::parse();
+    if args.profile {
+        print_profiles(&args);
+        return;
+    }
     let all_results = args
         .fonts
         .par_iter()
@@ -85,7 +180,6 @@ fn main() {
         let all_keys: BTreeSet<&str> = all_results
             .iter()
             .flat_map(|(_, results)| results.keys())
-            .map(|k| k.as_str())
             .collect();
         let all_keys: Vec<&str> = all_keys.into_iter().collect();
         println!("Font,Location,{}", all_keys.join(","));
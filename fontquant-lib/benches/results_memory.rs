@@ -0,0 +1,55 @@
+//! Measures how much heap a large batch of `Results` keeps alive.
+//!
+//! Quantifies one test font, then holds as many copies of its results as a long batch run
+//! would (fonts × locations), and reports the live heap per `Results`.
+//!
+//! Run with `cargo bench -p fontquant-lib --bench results_memory`.
+#![allow(clippy::unwrap_used, clippy::expect_used)]
+use std::{
+    alloc::{GlobalAlloc, Layout, System},
+    sync::atomic::{AtomicUsize, Ordering},
+};
+
+use fontquant_lib::{Results, run};
+
+const FONTS: usize = 50_000;
+const LOCATIONS: usize = 3;
+
+struct CountingAllocator;
+
+static LIVE_BYTES: AtomicUsize = AtomicUsize::new(0);
+
+unsafe impl GlobalAlloc for CountingAllocator {
+    unsafe fn alloc(&self, layout: Layout) -> *mut u8 {
+        LIVE_BYTES.fetch_add(layout.size(), Ordering::Relaxed);
+        unsafe { System.alloc(layout) }
+    }
+
+    unsafe fn dealloc(&self, ptr: *mut u8, layout: Layout) {
+        LIVE_BYTES.fetch_sub(layout.size(), Ordering::Relaxed);
+        unsafe { System.dealloc(ptr, layout) }
+    }
+}
+
+#[global_allocator]
+static ALLOCATOR: CountingAllocator = CountingAllocator;
+
+fn main() {
+    let font_binary = include_bytes!("../../tests/fonts/Ysabeau[wght].ttf");
+    let font = skrifa::FontRef::new(font_binary).expect("Failed to parse font");
+    let results = run(&font, &[]).expect("Failed to run metrics");
+    let metrics = results.iter().count();
+
+    let before = LIVE_BYTES.load(Ordering::Relaxed);
+    let batch: Vec<Results> = (0..FONTS * LOCATIONS).map(|_| results.clone()).collect();
+    let after = LIVE_BYTES.load(Ordering::Relaxed);
+
+    let total = after - before;
+    println!(
+        "{} results with {} metrics each: {:.1} MiB live, {} bytes per result",
+        batch.len(),
+        metrics,
+        total as f64 / (1024.0 * 1024.0),
+        total / batch.len()
+    );
+}
@@ -8,4 +8,8 @@ pub enum FontquantError {
     SkrifaDraw(#[from] skrifa::outline::DrawError),
     #[error("linesweeper could not simplify a glyph")]
     LinesweeperError,
+    #[error("the run was cancelled")]
+    Cancelled,
+    #[error("the profile tolerance must be a positive number, not {0}")]
+    InvalidTolerance(f64),
 }
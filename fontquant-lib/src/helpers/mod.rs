@@ -2,6 +2,7 @@ use kurbo::{BezPath, Line, ParamCurve, Point};
 
 pub mod raycaster;
 pub mod shaping;
+pub mod static_gsub;
 pub mod strokecontrast;
 
 pub(crate) fn remove_outliers<T, F>(list: &mut Vec<T>, f: F)
@@ -3,6 +3,8 @@ use std::collections::HashMap;
 use harfrust::{GlyphBuffer, ShapeOptions};
 use skrifa::{FontRef, GlyphId, MetadataProvider, Tag};
 
+use crate::helpers::static_gsub::StaticSubstitutions;
+
 pub fn shape_with_features(font: &FontRef, text: &str, features: &[Tag]) -> GlyphBuffer {
     #[allow(clippy::unwrap_used)] // May God forgive
     let harfrust_fontref = harfrust::FontRef::new(font.data().as_bytes()).unwrap();
@@ -122,6 +124,16 @@ pub fn shapes_differently_with_features(font: &FontRef, text: &str, features: &[
     glyphs_no_feature != glyphs_with_feature
 }
 
+/// Returns `true` if shaping the single character `c` with `feature` produces a different
+/// result than shaping it without. Static GSUB analysis is tried first, and the character is
+/// only shaped if the analysis can't settle it.
+pub fn char_shapes_differently_with_feature(font: &FontRef, c: char, feature: Tag) -> bool {
+    font.charmap()
+        .map(c)
+        .and_then(|glyph| StaticSubstitutions::new(font, feature)?.changes(glyph))
+        .unwrap_or_else(|| shapes_differently_with_features(font, &c.to_string(), &[feature]))
+}
+
 pub fn ratio_of_different_shapes<T: Fn(char) -> bool>(
     font: &FontRef,
     predicate: T,
@@ -129,14 +141,23 @@ pub fn ratio_of_different_shapes<T: Fn(char) -> bool>(
 ) -> f64 {
     let codepoints = font.charmap().mappings().collect::<HashMap<u32, GlyphId>>();
     let chars = codepoints
-        .keys()
-        .filter_map(|unicode| char::from_u32(*unicode))
-        .filter(|c| predicate(*c))
-        .collect::<Vec<char>>();
+        .iter()
+        .filter_map(|(unicode, glyph)| char::from_u32(*unicode).map(|c| (c, *glyph)))
+        .filter(|(c, _)| predicate(*c))
+        .collect::<Vec<(char, GlyphId)>>();
     let char_count = chars.len() as f64;
+    // Plain single and alternate substitutions can be settled without shaping
+    let substitutions = StaticSubstitutions::new(font, feature);
     let different_shapes_count = chars
         .iter()
-        .filter(|c| shapes_differently_with_features(font, &c.to_string(), &[feature]))
+        .filter(|(c, glyph)| {
+            substitutions
+                .as_ref()
+                .and_then(|substitutions| substitutions.changes(*glyph))
+                .unwrap_or_else(|| {
+                    shapes_differently_with_features(font, &c.to_string(), &[feature])
+                })
+        })
         .count() as f64;
     different_shapes_count / char_count
 }
@@ -0,0 +1,444 @@
+//! Static analysis of GSUB single and alternate substitutions
+//!
+//! Proving that a feature works by shaping every candidate character with and without it is
+//! expensive, but most of the features we test (`smcp`, `c2sc`, `case`, `sups`, `sinf`, `zero`)
+//! are plain single or alternate substitutions. For a single-character string we can usually
+//! work out what shaping would do by walking the feature's lookups ourselves.
+//!
+//! Whenever a glyph is touched by something we can't reason about statically (multiple,
+//! ligature, contextual and chaining lookups, lookup flags which skip glyph classes, or any
+//! lookup of a feature the shaper enables by default), [`StaticSubstitutions::changes`] returns
+//! `None` and the caller has to fall back to shaping.
+use std::collections::{BTreeSet, HashMap, HashSet};
+
+use read_fonts::{
+    ReadError, TableProvider,
+    tables::{
+        gsub::{AlternateSubstFormat1, ExtensionSubtable, SingleSubst, SubstitutionLookup},
+        layout::{
+            ChainedSequenceContext, CoverageTable, FeatureList, LangSys, ScriptList,
+            SequenceContext,
+        },
+    },
+};
+use skrifa::{FontRef, GlyphId, Tag};
+
+/// Script tags tried, in order, when selecting the script for Latin text. This mirrors the
+/// shaper's own fallback chain for `Some(harfrust::script::LATIN)` with no language.
+const SCRIPT_TAGS: [Tag; 3] = [Tag::new(b"latn"), Tag::new(b"DFLT"), Tag::new(b"dflt")];
+
+/// Features the shaper applies to horizontal Latin text without being asked to.
+///
+/// `frac`, `numr` and `dnom` are left out on purpose: they are only switched on around a
+/// fraction slash, which never occurs in the single characters we analyse.
+const DEFAULT_FEATURES: [Tag; 19] = [
+    Tag::new(b"rvrn"),
+    Tag::new(b"ltra"),
+    Tag::new(b"ltrm"),
+    Tag::new(b"rand"),
+    Tag::new(b"abvm"),
+    Tag::new(b"blwm"),
+    Tag::new(b"ccmp"),
+    Tag::new(b"locl"),
+    Tag::new(b"mark"),
+    Tag::new(b"mkmk"),
+    Tag::new(b"rlig"),
+    Tag::new(b"calt"),
+    Tag::new(b"clig"),
+    Tag::new(b"curs"),
+    Tag::new(b"dist"),
+    Tag::new(b"kern"),
+    Tag::new(b"liga"),
+    Tag::new(b"rclt"),
+    Tag::new(b"trak"),
+];
+
+/// Lookup flag bits which make a lookup skip some glyph classes (ignore base glyphs, ligatures
+/// or marks, mark filtering sets and mark attachment types). Whether a glyph is skipped depends
+/// on GDEF and on the shaper's synthesized glyph classes, so we don't try to follow it.
+const SKIPPING_LOOKUP_FLAGS: u16 = 0xFF1E;
+
+/// Glyphs covered by one subtable, mapped to their replacement if we know it statically,
+/// or to `None` if only shaping can tell.
+type SubtableEffect = Vec<(GlyphId, Option<GlyphId>)>;
+
+/// What a single GSUB lookup does to a glyph at the start of the buffer
+#[derive(Debug, Default)]
+struct LookupEffect {
+    substitutions: HashMap<GlyphId, GlyphId>,
+    undecidable: HashSet<GlyphId>,
+}
+
+impl LookupEffect {
+    fn from_lookup(lookup: &SubstitutionLookup) -> Result<Self, ReadError> {
+        let skips_glyphs = lookup_flag_bits(lookup) & SKIPPING_LOOKUP_FLAGS != 0;
+        let mut effect = LookupEffect::default();
+        // The first subtable which covers a glyph wins
+        for subtable in lookup_subtables(lookup)? {
+            for (glyph, replacement) in subtable {
+                if effect.substitutions.contains_key(&glyph) || effect.undecidable.contains(&glyph)
+                {
+                    continue;
+                }
+                match replacement {
+                    Some(replacement) if !skips_glyphs => {
+                        effect.substitutions.insert(glyph, replacement);
+                    }
+                    _ => {
+                        effect.undecidable.insert(glyph);
+                    }
+                }
+            }
+        }
+        Ok(effect)
+    }
+
+    fn covered_glyphs(&self) -> impl Iterator<Item = GlyphId> + '_ {
+        self.substitutions
+            .keys()
+            .chain(self.undecidable.iter())
+            .copied()
+    }
+}
+
+fn lookup_flag_bits(lookup: &SubstitutionLookup) -> u16 {
+    match lookup {
+        SubstitutionLookup::Single(lookup) => lookup.lookup_flag().to_bits(),
+        SubstitutionLookup::Multiple(lookup) => lookup.lookup_flag().to_bits(),
+        SubstitutionLookup::Alternate(lookup) => lookup.lookup_flag().to_bits(),
+        SubstitutionLookup::Ligature(lookup) => lookup.lookup_flag().to_bits(),
+        SubstitutionLookup::Contextual(lookup) => lookup.lookup_flag().to_bits(),
+        SubstitutionLookup::ChainContextual(lookup) => lookup.lookup_flag().to_bits(),
+        SubstitutionLookup::Extension(lookup) => lookup.lookup_flag().to_bits(),
+        SubstitutionLookup::Reverse(lookup) => lookup.lookup_flag().to_bits(),
+    }
+}
+
+fn lookup_subtables(lookup: &SubstitutionLookup) -> Result<Vec<SubtableEffect>, ReadError> {
+    match lookup {
+        SubstitutionLookup::Single(lookup) => lookup
+            .subtables()
+            .iter()
+            .map(|subtable| single_subst(&subtable?))
+            .collect(),
+        SubstitutionLookup::Alternate(lookup) => lookup
+            .subtables()
+            .iter()
+            .map(|subtable| alternate_subst(&subtable?))
+            .collect(),
+        SubstitutionLookup::Multiple(lookup) => lookup
+            .subtables()
+            .iter()
+            .map(|subtable| Ok(opaque(&subtable?.coverage()?)))
+            .collect(),
+        SubstitutionLookup::Ligature(lookup) => lookup
+            .subtables()
+            .iter()
+            .map(|subtable| Ok(opaque(&subtable?.coverage()?)))
+            .collect(),
+        SubstitutionLookup::Reverse(lookup) => lookup
+            .subtables()
+            .iter()
+            .map(|subtable| Ok(opaque(&subtable?.coverage()?)))
+            .collect(),
+        SubstitutionLookup::Contextual(lookup) => lookup
+            .subtables()
+            .iter()
+            .map(|subtable| sequence_context(&subtable?))
+            .collect(),
+        SubstitutionLookup::ChainContextual(lookup) => lookup
+            .subtables()
+            .iter()
+            .map(|subtable| chained_sequence_context(&subtable?))
+            .collect(),
+        SubstitutionLookup::Extension(lookup) => lookup
+            .subtables()
+            .iter()
+            .map(|subtable| match subtable? {
+                ExtensionSubtable::Single(ext) => single_subst(&ext.extension()?),
+                ExtensionSubtable::Alternate(ext) => alternate_subst(&ext.extension()?),
+                ExtensionSubtable::Multiple(ext) => Ok(opaque(&ext.extension()?.coverage()?)),
+                ExtensionSubtable::Ligature(ext) => Ok(opaque(&ext.extension()?.coverage()?)),
+                ExtensionSubtable::Reverse(ext) => Ok(opaque(&ext.extension()?.coverage()?)),
+                ExtensionSubtable::Contextual(ext) => sequence_context(&ext.extension()?),
+                ExtensionSubtable::ChainContextual(ext) => {
+                    chained_sequence_context(&ext.extension()?)
+                }
+            })
+            .collect(),
+    }
+}
+
+fn single_subst(subtable: &SingleSubst) -> Result<SubtableEffect, ReadError> {
+    Ok(match subtable {
+        SingleSubst::Format1(table) => {
+            let delta = table.delta_glyph_id() as i32;
+            table
+                .coverage()?
+                .iter()
+                .map(|glyph| {
+                    // Addition is modulo 65536, as per the spec
+                    let replacement = (glyph.to_u32() as i32 + delta).rem_euclid(0x10000);
+                    (glyph.into(), Some(GlyphId::new(replacement as u32)))
+                })
+                .collect()
+        }
+        SingleSubst::Format2(table) => table
+            .coverage()?
+            .iter()
+            .zip(table.substitute_glyph_ids())
+            .map(|(glyph, replacement)| (glyph.into(), Some(replacement.get().into())))
+            .collect(),
+    })
+}
+
+fn alternate_subst(subtable: &AlternateSubstFormat1) -> Result<SubtableEffect, ReadError> {
+    // Turning a feature on with value 1 selects the first alternate
+    subtable
+        .coverage()?
+        .iter()
+        .zip(subtable.alternate_sets().iter())
+        .map(|(glyph, alternate_set)| {
+            let first = alternate_set?
+                .alternate_glyph_ids()
+                .first()
+                .map(|replacement| replacement.get().into());
+            Ok((glyph.into(), first))
+        })
+        .collect()
+}
+
+fn opaque(coverage: &CoverageTable) -> SubtableEffect {
+    coverage.iter().map(|glyph| (glyph.into(), None)).collect()
+}
+
+fn sequence_context(subtable: &SequenceContext) -> Result<SubtableEffect, ReadError> {
+    Ok(match subtable {
+        SequenceContext::Format1(table) => opaque(&table.coverage()?),
+        SequenceContext::Format2(table) => opaque(&table.coverage()?),
+        SequenceContext::Format3(table) => match table.coverages().iter().next() {
+            Some(coverage) => opaque(&coverage?),
+            None => vec![],
+        },
+    })
+}
+
+fn chained_sequence_context(
+    subtable: &ChainedSequenceContext,
+) -> Result<SubtableEffect, ReadError> {
+    Ok(match subtable {
+        ChainedSequenceContext::Format1(table) => opaque(&table.coverage()?),
+        ChainedSequenceContext::Format2(table) => opaque(&table.coverage()?),
+        ChainedSequenceContext::Format3(table) => match table.input_coverages().iter().next() {
+            Some(coverage) => opaque(&coverage?),
+            None => vec![],
+        },
+    })
+}
+
+/// Returns the default language system of the script the shaper would pick for Latin text,
+/// falling back to a language system explicitly tagged `dflt` like the shaper does.
+fn default_lang_sys<'a>(script_list: &ScriptList<'a>) -> Result<Option<LangSys<'a>>, ReadError> {
+    let Some(record) = SCRIPT_TAGS.iter().find_map(|tag| {
+        script_list
+            .script_records()
+            .iter()
+            .find(|record| record.script_tag() == *tag)
+    }) else {
+        return Ok(None);
+    };
+    let script = record.script(script_list.offset_data())?;
+    if let Some(lang_sys) = script.default_lang_sys().transpose()? {
+        return Ok(Some(lang_sys));
+    }
+    script
+        .lang_sys_records()
+        .iter()
+        .find(|record| record.lang_sys_tag() == Tag::new(b"dflt"))
+        .map(|record| record.lang_sys(script.offset_data()))
+        .transpose()
+}
+
+/// Returns the lookup indices of the first feature in `lang_sys` tagged `feature`,
+/// which is the one the shaper will use.
+fn feature_lookups(
+    feature_list: &FeatureList,
+    lang_sys: &LangSys,
+    feature: Tag,
+) -> Result<BTreeSet<u16>, ReadError> {
+    let records = feature_list.feature_records();
+    let Some(record) = lang_sys
+        .feature_indices()
+        .iter()
+        .filter_map(|index| records.get(index.get() as usize))
+        .find(|record| record.feature_tag() == feature)
+    else {
+        return Ok(BTreeSet::new());
+    };
+    Ok(record
+        .feature(feature_list.offset_data())?
+        .lookup_list_indices()
+        .iter()
+        .map(|index| index.get())
+        .collect())
+}
+
+/// Returns the lookup indices of every feature in `lang_sys` the shaper turns on by itself,
+/// including the required feature.
+fn default_lookups(
+    feature_list: &FeatureList,
+    lang_sys: &LangSys,
+) -> Result<BTreeSet<u16>, ReadError> {
+    let records = feature_list.feature_records();
+    let required = lang_sys.required_feature_index();
+    let mut lookups = BTreeSet::new();
+    for index in lang_sys
+        .feature_indices()
+        .iter()
+        .map(|index| index.get())
+        .chain((required != 0xFFFF).then_some(required))
+    {
+        let Some(record) = records.get(index as usize) else {
+            continue;
+        };
+        if index == required || DEFAULT_FEATURES.contains(&record.feature_tag()) {
+            lookups.extend(
+                record
+                    .feature(feature_list.offset_data())?
+                    .lookup_list_indices()
+                    .iter()
+                    .map(|index| index.get()),
+            );
+        }
+    }
+    Ok(lookups)
+}
+
+/// The statically known effect of turning on one GSUB feature, for single-glyph buffers
+#[derive(Debug)]
+pub(crate) struct StaticSubstitutions {
+    /// The feature's lookups, in the order the shaper applies them
+    lookups: Vec<LookupEffect>,
+    /// Glyphs which any default feature's lookup could act upon
+    default_coverage: HashSet<GlyphId>,
+}
+
+impl StaticSubstitutions {
+    /// Analyses `feature` in the default language system of the font's Latin script.
+    ///
+    /// Returns `None` if nothing can be settled statically for this feature at all, e.g.
+    /// because it also has GPOS lookups, the font uses feature variations or the font has
+    /// no language system the shaper would use for Latin text.
+    pub(crate) fn new(font: &FontRef, feature: Tag) -> Option<Self> {
+        Self::analyse(font, feature).ok().flatten()
+    }
+
+    fn analyse(font: &FontRef, feature: Tag) -> Result<Option<Self>, ReadError> {
+        if let Ok(gpos) = font.gpos() {
+            if gpos.feature_variations().is_some() {
+                return Ok(None);
+            }
+            // Without a language system we can't tell which GPOS features apply
+            let Some(lang_sys) = default_lang_sys(&gpos.script_list()?)? else {
+                return Ok(None);
+            };
+            if !feature_lookups(&gpos.feature_list()?, &lang_sys, feature)?.is_empty() {
+                return Ok(None);
+            }
+        }
+        let mut substitutions = StaticSubstitutions {
+            lookups: vec![],
+            default_coverage: HashSet::new(),
+        };
+        let Ok(gsub) = font.gsub() else {
+            return Ok(Some(substitutions));
+        };
+        if gsub.feature_variations().is_some() {
+            return Ok(None);
+        }
+        // The shaper may still pick some other script or language system; leave it to
+        // shaping rather than guess
+        let Some(lang_sys) = default_lang_sys(&gsub.script_list()?)? else {
+            return Ok(None);
+        };
+        let feature_list = gsub.feature_list()?;
+        let lookup_list = gsub.lookup_list()?;
+        let lookups = lookup_list.lookups();
+        for index in default_lookups(&feature_list, &lang_sys)? {
+            let effect = LookupEffect::from_lookup(&lookups.get(index as usize)?)?;
+            substitutions
+                .default_coverage
+                .extend(effect.covered_glyphs());
+        }
+        for index in feature_lookups(&feature_list, &lang_sys, feature)? {
+            substitutions
+                .lookups
+                .push(LookupEffect::from_lookup(&lookups.get(index as usize)?)?);
+        }
+        Ok(Some(substitutions))
+    }
+
+    /// Returns whether shaping a lone `glyph` with the feature turned on gives a different
+    /// glyph than shaping it without, or `None` if only shaping can tell.
+    pub(crate) fn changes(&self, glyph: GlyphId) -> Option<bool> {
+        if self.default_coverage.contains(&glyph) {
+            return None;
+        }
+        let mut current = glyph;
+        for lookup in self.lookups.iter() {
+            if lookup.undecidable.contains(&current) {
+                return None;
+            }
+            if let Some(&replacement) = lookup.substitutions.get(&current) {
+                current = replacement;
+                if self.default_coverage.contains(&current) {
+                    return None;
+                }
+            }
+        }
+        Some(current != glyph)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    #![allow(clippy::expect_used, clippy::unwrap_used)]
+    use skrifa::MetadataProvider;
+
+    use crate::helpers::shaping::shapes_differently_with_features;
+
+    use super::*;
+
+    #[test]
+    fn test_static_analysis_agrees_with_shaping() {
+        let fonts_dir = concat!(env!("CARGO_MANIFEST_DIR"), "/../tests/fonts");
+        let mut settled = 0;
+        for entry in std::fs::read_dir(fonts_dir).unwrap() {
+            let path = entry.unwrap().path();
+            let data = std::fs::read(&path).unwrap();
+            let font = FontRef::new(&data).unwrap();
+            for feature in [b"smcp", b"c2sc", b"case", b"sups", b"sinf", b"zero"] {
+                let feature = Tag::new(feature);
+                let Some(substitutions) = StaticSubstitutions::new(&font, feature) else {
+                    continue;
+                };
+                for (unicode, glyph) in font.charmap().mappings() {
+                    let Some(c) = char::from_u32(unicode) else {
+                        continue;
+                    };
+                    let Some(changes) = substitutions.changes(glyph) else {
+                        continue;
+                    };
+                    settled += 1;
+                    assert_eq!(
+                        changes,
+                        shapes_differently_with_features(&font, &c.to_string(), &[feature]),
+                        "{feature} on {c:?} in {}",
+                        path.display()
+                    );
+                }
+            }
+        }
+        assert!(settled > 0);
+    }
+}
@@ -2,23 +2,30 @@
 use quantifiers::ALL_QUANTIFIERS;
 
 use crate::error::FontquantError;
-use std::collections::{BTreeMap, HashMap};
+use std::{
+    collections::HashMap,
+    sync::atomic::{AtomicBool, Ordering},
+};
 
 mod bezglyph;
 mod error;
 mod helpers;
 mod monkeypatching;
+pub mod profile;
 pub mod quantifiers;
+mod registry;
+
+pub use registry::{METRIC_COUNT, METRIC_NAMES, MetricId};
 
 #[macro_export]
 macro_rules! quantifier {
     ($ident:ident, $name:expr, $description:expr, $example_value:expr) => {
-        static $ident: std::sync::LazyLock<$crate::MetricKey> =
-            std::sync::LazyLock::new(|| $crate::MetricKey {
-                name: $name.to_string(),
-                description: $description.to_string(),
-                example_value: $example_value,
-            });
+        static $ident: $crate::MetricKey = $crate::MetricKey {
+            id: $crate::MetricId::from_name($name),
+            name: $name,
+            description: $description,
+            example_value: || $example_value,
+        };
     };
 }
 
@@ -54,6 +61,18 @@ impl MetricValue {
             None
         }
     }
+
+    /// Returns the value as a number, for any of the numeric variants
+    pub fn as_f64(&self) -> Option<f64> {
+        match self {
+            MetricValue::Metric(value)
+            | MetricValue::Percentage(value)
+            | MetricValue::Angle(value)
+            | MetricValue::PerMille(value) => Some(*value),
+            MetricValue::Integer(value) => Some(*value as f64),
+            _ => None,
+        }
+    }
 }
 
 impl TryInto<f64> for MetricValue {
@@ -97,39 +116,67 @@ impl std::fmt::Display for MetricValue {
 
 #[derive(Debug, Clone)]
 pub struct MetricKey {
-    pub name: String,
-    pub description: String,
-    pub example_value: MetricValue,
+    pub id: MetricId,
+    pub name: &'static str,
+    pub description: &'static str,
+    pub example_value: fn() -> MetricValue,
 }
 
 pub type Metric = (&'static MetricKey, MetricValue);
 
-#[derive(Debug, Clone, Default)]
-pub struct Results(BTreeMap<String, Metric>);
+/// Metric values for one font and location, stored in a dense slot per registered metric
+#[derive(Debug, Clone)]
+pub struct Results(Box<[Option<Metric>]>);
+
+impl Default for Results {
+    fn default() -> Self {
+        Results((0..METRIC_COUNT).map(|_| None).collect())
+    }
+}
+
 impl Results {
     pub fn new() -> Self {
         Default::default()
     }
 
     pub fn add_metric(&mut self, metric: &'static MetricKey, value: MetricValue) {
-        self.0.insert(metric.name.clone(), (metric, value));
+        self.0[metric.id.index()] = Some((metric, value));
     }
 
     pub fn get(&self, name: &str) -> Option<&Metric> {
-        self.0.get(name)
+        self.get_by_id(MetricId::lookup(name)?)
+    }
+
+    pub fn get_by_id(&self, id: MetricId) -> Option<&Metric> {
+        self.0[id.index()].as_ref()
     }
-    pub fn iter(&self) -> impl Iterator<Item = (&String, &Metric)> {
-        self.0.iter()
+
+    /// Iterates over the metrics which have a value, in alphabetical order of their names
+    pub fn iter(&self) -> impl Iterator<Item = (&'static str, &Metric)> {
+        self.0
+            .iter()
+            .flatten()
+            .map(|metric| (metric.0.name, metric))
     }
 
-    pub fn keys(&self) -> impl Iterator<Item = &String> {
-        self.0.keys()
+    pub fn keys(&self) -> impl Iterator<Item = &'static str> {
+        self.iter().map(|(name, _)| name)
     }
 }
 
 pub fn run(
     font: &skrifa::FontRef,
     location: &[skrifa::setting::VariationSetting],
+) -> Result<Results, FontquantError> {
+    run_cancellable(font, location, &AtomicBool::new(false))
+}
+
+/// Like [`run`], but checks `cancelled` before each quantifier and gives up with
+/// [`FontquantError::Cancelled`] once it has been set from another thread.
+pub fn run_cancellable(
+    font: &skrifa::FontRef,
+    location: &[skrifa::setting::VariationSetting],
+    cancelled: &AtomicBool,
 ) -> Result<Results, FontquantError> {
     let mut results = Results::new();
     // We don't need this yet, but when we seriously start playing with variations,
@@ -140,7 +187,27 @@ pub fn run(
     // axes.location_to_slice(location, &mut norm_location);
 
     for metric in ALL_QUANTIFIERS.iter() {
+        if cancelled.load(Ordering::Relaxed) {
+            return Err(FontquantError::Cancelled);
+        }
         metric(font, location, &mut results)?;
     }
     Ok(results)
 }
+
+#[cfg(test)]
+mod tests {
+    #![allow(clippy::expect_used, clippy::unwrap_used)]
+    use super::*;
+
+    #[test]
+    fn test_run_cancelled() {
+        let font = skrifa::FontRef::new(include_bytes!("../../tests/fonts/YoungSerif-Regular.ttf"))
+            .unwrap();
+        let cancelled = AtomicBool::new(true);
+        assert!(matches!(
+            run_cancellable(&font, &[], &cancelled),
+            Err(FontquantError::Cancelled)
+        ));
+    }
+}
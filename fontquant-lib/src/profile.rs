@@ -0,0 +1,518 @@
+//! Axis profiles: how variable-aware metrics change along each axis of a variable font
+//!
+//! Rather than evaluating the metrics on a dense grid, each axis is first sampled at its
+//! extremes, its default, its intermediate masters and the positions of the named
+//! instances. Intervals are then split
+//! in half only where the measured midpoint deviates from linear interpolation between its
+//! neighbours by more than a tolerance, so smooth stretches of a curve cost no more than
+//! their endpoints. The intervals which deviate the most are refined first, so the
+//! evaluation budget goes wherever the curve bends the most along the whole axis.
+//!
+//! Each axis is profiled on its own, with all other axes held at their defaults.
+use std::{cmp::Ordering, collections::BinaryHeap};
+
+use skrifa::{
+    FontRef, MetadataProvider, Tag,
+    raw::{ReadError, TableProvider},
+    setting::VariationSetting,
+};
+
+use crate::{MetricValue, Results, error::FontquantError, quantifiers::VARIABLE_AWARE_QUANTIFIERS};
+
+#[derive(Debug, Clone)]
+pub struct ProfileSettings {
+    /// How far a measured midpoint may stray from linear interpolation before its interval
+    /// is refined, as a fraction of the metric's span across the initial samples
+    pub tolerance: f64,
+    /// Deviations up to this many units never count for metrics reported in whole units
+    /// (per-mille and integer values), so rounding steps aren't mistaken for curvature
+    pub absolute_tolerance: f64,
+    /// Upper bound on the number of locations evaluated per axis, named instances included.
+    /// The extremes, the default and the masters are always evaluated, even if that
+    /// exceeds it.
+    pub max_evaluations: usize,
+    /// Intervals narrower than this (in axis user units) are never split
+    pub min_step: f32,
+}
+
+impl Default for ProfileSettings {
+    fn default() -> Self {
+        ProfileSettings {
+            tolerance: 0.01,
+            absolute_tolerance: 1.0,
+            max_evaluations: 24,
+            min_step: 1.0,
+        }
+    }
+}
+
+impl ProfileSettings {
+    /// Checks that the tolerances can give meaningful thresholds: a tolerance which is zero,
+    /// negative or not finite would refine everywhere or nowhere.
+    pub fn validate(&self) -> Result<(), FontquantError> {
+        if !(self.tolerance.is_finite() && self.tolerance > 0.0) {
+            return Err(FontquantError::InvalidTolerance(self.tolerance));
+        }
+        if !(self.absolute_tolerance.is_finite() && self.absolute_tolerance >= 0.0) {
+            return Err(FontquantError::InvalidTolerance(self.absolute_tolerance));
+        }
+        Ok(())
+    }
+}
+
+#[derive(Debug, Clone)]
+pub struct ProfileSample {
+    /// Position on the axis, in user units
+    pub position: f32,
+    pub results: Results,
+}
+
+/// The variable-aware metrics sampled along one axis, with a piecewise linear model
+/// between the samples
+#[derive(Debug, Clone)]
+pub struct AxisProfile {
+    pub axis: Tag,
+    pub min: f32,
+    pub default: f32,
+    pub max: f32,
+    /// Samples sorted by position
+    pub samples: Vec<ProfileSample>,
+}
+
+impl AxisProfile {
+    /// Returns the sampled `(position, value)` points of a numeric metric
+    pub fn curve(&self, metric: &str) -> Vec<(f32, f64)> {
+        self.samples
+            .iter()
+            .filter_map(|sample| {
+                let (_key, value) = sample.results.get(metric)?;
+                Some((sample.position, value.as_f64()?))
+            })
+            .collect()
+    }
+
+    /// Estimates a metric at any position on the axis by linear interpolation between the
+    /// neighbouring samples. Positions outside the axis range are clamped to it.
+    pub fn interpolate(&self, metric: &str, position: f32) -> Option<f64> {
+        interpolate(&self.curve(metric), position.clamp(self.min, self.max))
+    }
+}
+
+fn interpolate(curve: &[(f32, f64)], position: f32) -> Option<f64> {
+    let after = curve.partition_point(|(x, _)| *x < position);
+    let before = after.checked_sub(1).and_then(|index| curve.get(index));
+    match (before, curve.get(after)) {
+        (_, Some(&(x1, y1))) if x1 == position => Some(y1),
+        (Some(&(x0, y0)), Some(&(x1, y1))) => {
+            Some(y0 + (y1 - y0) * ((position - x0) / (x1 - x0)) as f64)
+        }
+        (Some(&(_, y0)), None) => Some(y0),
+        (None, Some(&(_, y1))) => Some(y1),
+        (None, None) => None,
+    }
+}
+
+fn evaluate(font: &FontRef, axis: Tag, position: f32) -> Result<ProfileSample, FontquantError> {
+    let location = [VariationSetting::new(axis, position)];
+    let mut results = Results::new();
+    for quantifier in VARIABLE_AWARE_QUANTIFIERS.iter() {
+        quantifier(font, &location, &mut results)?;
+    }
+    Ok(ProfileSample { position, results })
+}
+
+/// How far `middle` strays from the line between `left` and `right`, relative to each
+/// metric's threshold. Anything above 1.0 is worth refining.
+fn deviation(
+    left: &ProfileSample,
+    middle: &ProfileSample,
+    right: &ProfileSample,
+    thresholds: &[(&'static str, f64)],
+) -> f64 {
+    let t = ((middle.position - left.position) / (right.position - left.position)) as f64;
+    thresholds
+        .iter()
+        .map(|(name, threshold)| {
+            let value = |sample: &ProfileSample| {
+                sample
+                    .results
+                    .get(name)
+                    .and_then(|(_key, value)| value.as_f64())
+            };
+            match (value(left), value(middle), value(right)) {
+                (Some(y0), Some(y), Some(y1)) => {
+                    let expected = y0 + (y1 - y0) * t;
+                    (y - expected).abs() / threshold
+                }
+                (None, None, None) => 0.0,
+                // A metric appearing or disappearing is worth a closer look
+                _ => f64::INFINITY,
+            }
+        })
+        .fold(0.0, f64::max)
+}
+
+/// The deviation from linear interpolation each numeric metric may show before an interval
+/// is refined: `tolerance` times the metric's span across `samples`, or its magnitude if it
+/// doesn't vary at all, but never less than `absolute_tolerance` for whole-unit metrics.
+fn metric_thresholds(
+    samples: &[ProfileSample],
+    settings: &ProfileSettings,
+) -> Vec<(&'static str, f64)> {
+    let mut names = samples
+        .iter()
+        .flat_map(|sample| sample.results.keys())
+        .collect::<Vec<_>>();
+    names.sort_unstable();
+    names.dedup();
+    names
+        .into_iter()
+        .filter_map(|name| {
+            let values = samples
+                .iter()
+                .filter_map(|sample| sample.results.get(name))
+                .collect::<Vec<_>>();
+            let numbers = values
+                .iter()
+                .filter_map(|(_key, value)| value.as_f64())
+                .collect::<Vec<_>>();
+            let min = numbers.iter().copied().reduce(f64::min)?;
+            let max = numbers.iter().copied().reduce(f64::max)?;
+            let scale = if max > min {
+                max - min
+            } else {
+                max.abs().max(1.0)
+            };
+            let whole_units = values.iter().all(|(_key, value)| {
+                matches!(value, MetricValue::PerMille(_) | MetricValue::Integer(_))
+            });
+            let floor = if whole_units {
+                settings.absolute_tolerance
+            } else {
+                0.0
+            };
+            Some((name, (settings.tolerance * scale).max(floor)))
+        })
+        .collect()
+}
+
+/// Maps a normalized coordinate after `avar` back to the one before it
+fn unmap_avar(avar_map: &[(f32, f32)], coordinate: f32) -> f32 {
+    avar_map
+        .windows(2)
+        .find_map(|pair| {
+            let [(from0, to0), (from1, to1)] = [pair[0], pair[1]];
+            (to0 < to1 && (to0..=to1).contains(&coordinate))
+                .then(|| from0 + (coordinate - to0) * (from1 - from0) / (to1 - to0))
+        })
+        .unwrap_or(coordinate)
+}
+
+/// The positions (in user units) of the intermediate masters on the axis at `axis_index`:
+/// the peaks of the `gvar` regions which lie on this axis alone, and the points where
+/// `avar` bends the mapping to normalized coordinates. The metrics' curves bend there.
+fn master_positions(
+    font: &FontRef,
+    axis_index: usize,
+    (min, default, max): (f32, f32, f32),
+) -> Result<Vec<f32>, ReadError> {
+    let mut avar_map = vec![];
+    if let Ok(avar) = font.avar() {
+        let segment_maps = avar.axis_segment_maps();
+        if let Some(segment_maps) = segment_maps.iter().nth(axis_index) {
+            avar_map.extend(
+                segment_maps?
+                    .axis_value_maps()
+                    .iter()
+                    .map(|map| (map.from_coordinate().to_f32(), map.to_coordinate().to_f32())),
+            );
+        }
+    }
+    let mut coordinates = avar_map.iter().map(|(from, _to)| *from).collect::<Vec<_>>();
+    if let Ok(gvar) = font.gvar() {
+        for tuple in gvar.shared_tuples()?.tuples().iter() {
+            let tuple = tuple?;
+            let peaks = tuple.values();
+            let on_axis = peaks
+                .iter()
+                .enumerate()
+                .all(|(index, peak)| index == axis_index || peak.get().to_f32() == 0.0);
+            if let Some(peak) = peaks.get(axis_index)
+                && on_axis
+            {
+                coordinates.push(unmap_avar(&avar_map, peak.get().to_f32()));
+            }
+        }
+    }
+    Ok(coordinates
+        .into_iter()
+        .filter(|coordinate| *coordinate != 0.0 && coordinate.abs() < 1.0)
+        .map(|coordinate| {
+            let position = if coordinate < 0.0 {
+                default + coordinate * (default - min)
+            } else {
+                default + coordinate * (max - default)
+            };
+            // Undo the F2Dot14 rounding, so masters at whole user units land on them
+            (position * 100.0).round() / 100.0
+        })
+        .collect())
+}
+
+/// The axis positions to evaluate before any refinement: all of `fixed` (the extremes, the
+/// default and the masters), then as many named instances as the budget allows, each time
+/// picking the one furthest from those already chosen.
+fn seed_positions(fixed: &[f32], instances: &[f32], budget: usize) -> Vec<f32> {
+    let mut positions = fixed.to_vec();
+    positions.sort_by(f32::total_cmp);
+    positions.dedup();
+    let (Some(&min), Some(&max)) = (positions.first(), positions.last()) else {
+        return positions;
+    };
+    let mut instances = instances
+        .iter()
+        .copied()
+        .filter(|position| (min..=max).contains(position))
+        .collect::<Vec<_>>();
+    while positions.len() < budget {
+        let distance = |candidate: f32| {
+            positions
+                .iter()
+                .map(|position| (position - candidate).abs())
+                .fold(f32::INFINITY, f32::min)
+        };
+        let Some((index, furthest)) = instances
+            .iter()
+            .enumerate()
+            .max_by(|(_, a), (_, b)| distance(**a).total_cmp(&distance(**b)))
+        else {
+            break;
+        };
+        if distance(*furthest) == 0.0 {
+            break;
+        }
+        positions.push(instances.swap_remove(index));
+    }
+    positions.sort_by(f32::total_cmp);
+    positions
+}
+
+/// An interval between two samples waiting to be split, prioritised by how much the
+/// interval it was split from deviated, then by width
+struct Interval {
+    priority: f64,
+    left: usize,
+    right: usize,
+    width: f32,
+}
+
+impl Interval {
+    /// Returns `None` if the interval is too narrow to be split
+    fn between(
+        priority: f64,
+        (left, right): (usize, usize),
+        samples: &[ProfileSample],
+        settings: &ProfileSettings,
+    ) -> Option<Self> {
+        let width = samples[right].position - samples[left].position;
+        (width >= 2.0 * settings.min_step).then_some(Interval {
+            priority,
+            left,
+            right,
+            width,
+        })
+    }
+}
+
+impl PartialEq for Interval {
+    fn eq(&self, other: &Self) -> bool {
+        self.cmp(other) == Ordering::Equal
+    }
+}
+
+impl Eq for Interval {}
+
+impl PartialOrd for Interval {
+    fn partial_cmp(&self, other: &Self) -> Option<Ordering> {
+        Some(self.cmp(other))
+    }
+}
+
+impl Ord for Interval {
+    fn cmp(&self, other: &Self) -> Ordering {
+        self.priority
+            .total_cmp(&other.priority)
+            .then(self.width.total_cmp(&other.width))
+    }
+}
+
+/// Profiles every variable-aware metric along each axis in the font's `fvar` table.
+/// Static fonts have no axes and return an empty list.
+pub fn profile(
+    font: &FontRef,
+    settings: &ProfileSettings,
+) -> Result<Vec<AxisProfile>, FontquantError> {
+    settings.validate()?;
+    let mut profiles = vec![];
+    for (axis_index, axis) in font.axes().iter().enumerate() {
+        let (min, default, max) = (axis.min_value(), axis.default_value(), axis.max_value());
+        let instances = font
+            .named_instances()
+            .iter()
+            .filter_map(|instance| instance.user_coords().nth(axis_index))
+            .collect::<Vec<_>>();
+        let mut fixed = vec![min, default, max];
+        fixed.extend(master_positions(font, axis_index, (min, default, max))?);
+        let positions = seed_positions(&fixed, &instances, settings.max_evaluations);
+
+        let mut samples = positions
+            .into_iter()
+            .map(|position| evaluate(font, axis.tag(), position))
+            .collect::<Result<Vec<_>, _>>()?;
+        let thresholds = metric_thresholds(&samples, settings);
+
+        // Samples are only appended from here on, and sorted once refinement is done.
+        // Every initial interval gets checked before any of them is refined further.
+        let mut intervals = BinaryHeap::new();
+        for index in 1..samples.len() {
+            intervals.extend(Interval::between(
+                f64::INFINITY,
+                (index - 1, index),
+                &samples,
+                settings,
+            ));
+        }
+        while samples.len() < settings.max_evaluations
+            && let Some(Interval { left, right, .. }) = intervals.pop()
+        {
+            let position = (samples[left].position + samples[right].position) / 2.0;
+            let middle = evaluate(font, axis.tag(), position)?;
+            let deviation = deviation(&samples[left], &middle, &samples[right], &thresholds);
+            samples.push(middle);
+            if deviation > 1.0 {
+                let middle = samples.len() - 1;
+                for half in [(left, middle), (middle, right)] {
+                    intervals.extend(Interval::between(deviation, half, &samples, settings));
+                }
+            }
+        }
+        samples.sort_by(|a, b| a.position.total_cmp(&b.position));
+
+        profiles.push(AxisProfile {
+            axis: axis.tag(),
+            min,
+            default,
+            max,
+            samples,
+        });
+    }
+    Ok(profiles)
+}
+
+#[cfg(test)]
+mod tests {
+    #![allow(clippy::expect_used, clippy::unwrap_used)]
+    use super::*;
+
+    #[test]
+    fn test_interpolate() {
+        let curve = [(100.0, 1.0), (400.0, 4.0), (900.0, 6.0)];
+        assert_eq!(interpolate(&curve, 100.0), Some(1.0));
+        assert_eq!(interpolate(&curve, 250.0), Some(2.5));
+        assert_eq!(interpolate(&curve, 400.0), Some(4.0));
+        assert_eq!(interpolate(&curve, 650.0), Some(5.0));
+        assert_eq!(interpolate(&curve, 900.0), Some(6.0));
+        assert_eq!(interpolate(&[], 400.0), None);
+    }
+
+    #[test]
+    fn test_profile_weight() {
+        let font = FontRef::new(include_bytes!(
+            "../../tests/fonts/Foldit-VariableFont_wght.ttf"
+        ))
+        .unwrap();
+        let settings = ProfileSettings::default();
+        let profiles = profile(&font, &settings).expect("Shouldn't fail");
+        assert_eq!(profiles.len(), 1);
+        let wght = &profiles[0];
+        assert_eq!(wght.axis, Tag::new(b"wght"));
+        assert!(wght.samples.len() <= settings.max_evaluations);
+        assert_eq!(wght.samples[0].position, wght.min);
+        assert_eq!(wght.samples.last().unwrap().position, wght.max);
+        assert!(
+            wght.samples
+                .windows(2)
+                .all(|pair| pair[0].position < pair[1].position)
+        );
+        // Heavier instances should be measured heavier
+        let light = wght.interpolate("appearance/weight", wght.min).unwrap();
+        let heavy = wght.interpolate("appearance/weight", wght.max).unwrap();
+        assert!(heavy > light);
+    }
+
+    #[test]
+    fn test_invalid_tolerance() {
+        let font = FontRef::new(include_bytes!(
+            "../../tests/fonts/Foldit-VariableFont_wght.ttf"
+        ))
+        .unwrap();
+        for tolerance in [0.0, -0.01, f64::NAN, f64::INFINITY] {
+            let settings = ProfileSettings {
+                tolerance,
+                ..Default::default()
+            };
+            assert!(matches!(
+                profile(&font, &settings),
+                Err(FontquantError::InvalidTolerance(_))
+            ));
+        }
+    }
+
+    #[test]
+    fn test_seed_positions() {
+        let instances = [100.0, 250.0, 400.0, 700.0, 900.0];
+        assert_eq!(
+            seed_positions(&[100.0, 400.0, 900.0], &instances, 24),
+            instances
+        );
+        // Named instances share the budget, the ones furthest from the others first
+        assert_eq!(
+            seed_positions(&[100.0, 400.0, 900.0], &instances, 4),
+            [100.0, 400.0, 700.0, 900.0]
+        );
+        // but the extremes, the default and the masters are always evaluated
+        assert_eq!(
+            seed_positions(&[100.0, 400.0, 900.0, 600.0], &instances, 2),
+            [100.0, 400.0, 600.0, 900.0]
+        );
+    }
+
+    #[test]
+    fn test_master_positions() {
+        // Open Sans has an intermediate wght master at 700, and avar bends at 600 and 700
+        let font = FontRef::new(include_bytes!(
+            "../../tests/fonts/OpenSans-VariableFont_wdth,wght.ttf"
+        ))
+        .unwrap();
+        let mut masters = master_positions(&font, 0, (300.0, 400.0, 800.0)).unwrap();
+        masters.sort_by(f32::total_cmp);
+        masters.dedup();
+        assert_eq!(masters, [600.0, 700.0]);
+        assert_eq!(
+            master_positions(&font, 1, (75.0, 100.0, 100.0)).unwrap(),
+            []
+        );
+
+        // Roboto Flex's opsz axis bends at 36 and 84
+        let font = FontRef::new(include_bytes!("../../tests/fonts/RobotoFlex-Var.ttf")).unwrap();
+        let opsz = font
+            .axes()
+            .iter()
+            .position(|axis| axis.tag() == Tag::new(b"opsz"))
+            .unwrap();
+        assert_eq!(
+            master_positions(&font, opsz, (8.0, 14.0, 144.0)).unwrap(),
+            [36.0, 84.0]
+        );
+    }
+}
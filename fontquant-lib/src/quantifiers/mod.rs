@@ -27,3 +27,12 @@ pub const ALL_QUANTIFIERS: &[QuantifierFn] = &[
     features::gather_features,
     opentype::get_fields,
 ];
+
+/// Quantifiers whose numeric results depend on the variation location. These are the ones
+/// evaluated when profiling a font along its axes.
+pub const VARIABLE_AWARE_QUANTIFIERS: &[QuantifierFn] = &[
+    appearance::WholeFontStatistics::gather_from_font,
+    parametric::get_parametric,
+    appearance::get_stroke_contrast,
+    appearance::metrics::gather_from_font,
+];
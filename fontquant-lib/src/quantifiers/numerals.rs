@@ -13,8 +13,8 @@ use crate::{
     MetricValue,
     error::FontquantError,
     helpers::shaping::{
-        ratio_of_different_shapes, shape_with_features, shapes_differently_between,
-        shapes_differently_with_features,
+        char_shapes_differently_with_feature, ratio_of_different_shapes, shape_with_features,
+        shapes_differently_between, shapes_differently_with_features,
     },
     monkeypatching::MakeBezGlyphs,
     quantifier,
@@ -253,12 +253,11 @@ pub(crate) fn get_numeral_styles(
         .filter(|string| shapes_differently_with_features(font, string, &[frac]))
         .count() as f64
         / ENCODED_FRACTIONS.len() as f64;
-    let mut slashed_zero_checks: Vec<(&str, Vec<Tag>, Vec<Tag>)> = vec![
-        // Basic: does `zero` change the default shaping of "0"?
-        ("0", vec![], vec![Tag::new(b"zero")]),
-    ];
+    // Basic: does `zero` change the default shaping of "0"?
+    let zero_by_default = char_shapes_differently_with_feature(font, '0', Tag::new(b"zero"));
+    let mut slashed_zero_checks: Vec<(&str, Vec<Tag>, Vec<Tag>)> = vec![];
     // sups: does adding `zero` on top of `sups` change the shaping of "0"?
-    if shapes_differently_with_features(font, "0", &[Tag::new(b"sups")]) {
+    if char_shapes_differently_with_feature(font, '0', Tag::new(b"sups")) {
         slashed_zero_checks.push((
             "0",
             vec![Tag::new(b"sups")],
@@ -266,7 +265,7 @@ pub(crate) fn get_numeral_styles(
         ));
     }
     // sinf: does adding `zero` on top of `sinf` change the shaping of "0"?
-    if shapes_differently_with_features(font, "0", &[Tag::new(b"sinf")]) {
+    if char_shapes_differently_with_feature(font, '0', Tag::new(b"sinf")) {
         slashed_zero_checks.push((
             "0",
             vec![Tag::new(b"sinf")],
@@ -278,13 +277,14 @@ pub(crate) fn get_numeral_styles(
         slashed_zero_checks.push(("0/1", vec![frac], vec![Tag::new(b"zero"), frac]));
         slashed_zero_checks.push(("1/0", vec![frac], vec![Tag::new(b"zero"), frac]));
     }
-    let slashed_zero_ratio = slashed_zero_checks
+    let slashed_zero_ratio = (slashed_zero_checks
         .iter()
         .filter(|(string, base, with_zero)| {
             shapes_differently_between(font, string, base, with_zero)
         })
-        .count() as f64
-        / slashed_zero_checks.len() as f64;
+        .count()
+        + zero_by_default as usize) as f64
+        / (slashed_zero_checks.len() + 1) as f64;
 
     let default = default_numerals(font);
     results.add_metric(&DEFAULT_NUMERALS, MetricValue::String(default.to_string()));
@@ -1,5 +1,3 @@
-use std::sync::LazyLock;
-
 use read_fonts::TableProvider;
 use skrifa::{self, MetadataProvider, prelude::Size};
 
@@ -14,7 +12,7 @@ use crate::{
 };
 
 struct RaycasterBuilder<'a> {
-    metric: &'a LazyLock<MetricKey>,
+    metric: &'a MetricKey,
     glyph: char,
     start: ProportionalPoint,
     direction: Direction,
@@ -303,9 +301,9 @@ mod tests {
             let mut raycaster = Raycaster::new(&glyph, ProportionalPoint::new(0.0, 0.4), EAST);
             (builder.specializer)(&mut raycaster);
             // let data = raycaster.draw();
-            // let mut file = std::fs::File::create(builder.metric.name.clone() + ".png").unwrap();
+            // let mut file = std::fs::File::create(builder.metric.name.to_string() + ".png").unwrap();
             // file.write_all(data.as_bytes()).unwrap();
-            if let Some(expectation) = expectations.get(builder.metric.name.as_str()) {
+            if let Some(expectation) = expectations.get(builder.metric.name) {
                 let found = raycaster.median_pair_distance(true).round();
                 assert_eq!(
                     found, *expectation,
@@ -0,0 +1,154 @@
+//! The static table of every metric fontquant can report
+//!
+//! Each metric is identified by a small integer [`MetricId`], which is its position in
+//! [`METRIC_NAMES`]. The table is kept sorted by name, so iterating over [`crate::Results`]
+//! by ID visits metrics in alphabetical order. New metrics declared with the
+//! [`quantifier!`](crate::quantifier) macro must be added here, or the crate won't compile.
+
+/// Names of all registered metrics, sorted by byte order
+pub const METRIC_NAMES: [&str; METRIC_COUNT] = [
+    "appearance/ascender",
+    "appearance/cap_height",
+    "appearance/descender",
+    "appearance/i_width",
+    "appearance/lowercase_a_style",
+    "appearance/lowercase_g_style",
+    "appearance/monospaced",
+    "appearance/most_common_width",
+    "appearance/n_width",
+    "appearance/slant",
+    "appearance/space_width",
+    "appearance/stencil",
+    "appearance/weight",
+    "appearance/weight_perceptual",
+    "appearance/width",
+    "appearance/x_height",
+    "casing/caps-to-smallcaps",
+    "casing/case_sensitive_punctuation",
+    "casing/lowercase_shapes",
+    "casing/smallcaps",
+    "casing/unicase",
+    "features/feature_list",
+    "features/stylistic_sets",
+    "numerals/arbitrary_fractions",
+    "numerals/default_numerals",
+    "numerals/encoded_fractions",
+    "numerals/inferior_numerals",
+    "numerals/proportional_lining",
+    "numerals/proportional_oldstyle",
+    "numerals/slashed_zero",
+    "numerals/superior_numerals",
+    "numerals/tabular_lining",
+    "numerals/tabular_oldstyle",
+    "parametric/XCLR",
+    "parametric/XCLS",
+    "parametric/XOFI",
+    "parametric/XOLC",
+    "parametric/XOPQ",
+    "parametric/XTFI",
+    "parametric/XTLC",
+    "parametric/XTRA",
+    "parametric/YOFI",
+    "parametric/YOLC",
+    "parametric/YOPQ",
+    "parametric/YTAS",
+    "parametric/YTDE",
+    "proportion/lowercase",
+    "proportion/uppercase",
+    "stroke_contrast/antiqua",
+    "stroke_contrast/antiqua_angle",
+    "stroke_contrast/raycaster",
+];
+
+/// Number of registered metrics
+pub const METRIC_COUNT: usize = 51;
+
+const _: () = assert!(names_are_sorted(), "METRIC_NAMES must be sorted and unique");
+
+/// Index of a metric in [`METRIC_NAMES`]
+#[derive(Debug, Clone, Copy, PartialEq, Eq, PartialOrd, Ord, Hash)]
+pub struct MetricId(u16);
+
+impl MetricId {
+    /// Looks up a registered metric at compile time. Panics (and so fails the build when
+    /// used in a `static`) if the name isn't in [`METRIC_NAMES`].
+    pub const fn from_name(name: &str) -> Self {
+        let mut index = 0;
+        while index < METRIC_COUNT {
+            if str_eq(METRIC_NAMES[index], name) {
+                return MetricId(index as u16);
+            }
+            index += 1;
+        }
+        panic!("metric name is not registered in METRIC_NAMES");
+    }
+
+    /// Looks up a metric by its path, e.g. `casing/smallcaps`
+    pub fn lookup(name: &str) -> Option<Self> {
+        METRIC_NAMES
+            .binary_search(&name)
+            .ok()
+            .map(|index| MetricId(index as u16))
+    }
+
+    pub fn index(self) -> usize {
+        self.0 as usize
+    }
+
+    pub fn name(self) -> &'static str {
+        METRIC_NAMES[self.index()]
+    }
+}
+
+const fn str_eq(a: &str, b: &str) -> bool {
+    let (a, b) = (a.as_bytes(), b.as_bytes());
+    if a.len() != b.len() {
+        return false;
+    }
+    let mut i = 0;
+    while i < a.len() {
+        if a[i] != b[i] {
+            return false;
+        }
+        i += 1;
+    }
+    true
+}
+
+/// Byte-wise `a < b`, the ordering a `BTreeMap<String, _>` would use
+const fn str_lt(a: &str, b: &str) -> bool {
+    let (a, b) = (a.as_bytes(), b.as_bytes());
+    let mut i = 0;
+    while i < a.len() && i < b.len() {
+        if a[i] != b[i] {
+            return a[i] < b[i];
+        }
+        i += 1;
+    }
+    a.len() < b.len()
+}
+
+const fn names_are_sorted() -> bool {
+    let mut index = 1;
+    while index < METRIC_COUNT {
+        if !str_lt(METRIC_NAMES[index - 1], METRIC_NAMES[index]) {
+            return false;
+        }
+        index += 1;
+    }
+    true
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_lookup() {
+        for (index, name) in METRIC_NAMES.iter().enumerate() {
+            assert_eq!(MetricId::lookup(name), Some(MetricId(index as u16)));
+            assert_eq!(MetricId::from_name(name).name(), *name);
+        }
+        assert_eq!(MetricId::lookup("casing/not_a_metric"), None);
+    }
+}
@@ -1,4 +1,10 @@
-from fontquant._fontquant import run as rust_run
+import asyncio
+import bisect
+import collections
+import os
+import weakref
+
+from fontquant._fontquant import profile as rust_profile, run as rust_run, spawn_run
 
 
 class BaseDataType(object):
@@ -313,14 +319,16 @@ def order_dict(dictionary):
     return {k: order_dict(v) if isinstance(v, dict) else v for k, v in sorted(dictionary.items())}
 
 
-def quantify(font_path, includes=None, excludes=None, locations=None, debug=False, show=False, primary_script=None):
+def _merge_results(
+    rust_results, includes=None, excludes=None, locations=None, debug=False, show=False, primary_script=None
+):
     base = Base(locations)
     base.debug = debug
     base.show = show
     base.primary_script = primary_script
     value = base.value(includes, excludes)
     # Fill in from Rust
-    rust_values = {k: {"value": v} for k, v in rust_run(font_path).items()}
+    rust_values = {k: {"value": v} for k, v in rust_results.items()}
     # Split a/b/c to multilevel hash and merge
     for path, data in rust_values.items():
         keys = path.split("/")
@@ -332,3 +340,187 @@ def quantify(font_path, includes=None, excludes=None, locations=None, debug=Fals
         current_level[keys[-1]] = data
 
     return order_dict(value)
+
+
+def quantify(font_path, includes=None, excludes=None, locations=None, debug=False, show=False, primary_script=None):
+    return _merge_results(rust_run(font_path), includes, excludes, locations, debug, show, primary_script)
+
+
+class AxisProfile(object):
+    """Variable-aware metrics sampled along one axis, as returned by `profile_axes()`.
+
+    `positions` are the sampled axis locations (user units, ascending) and `curves` maps each
+    numeric metric path to its values at those positions. Between samples, the metrics are
+    modelled as piecewise linear.
+    """
+
+    def __init__(self, data):
+        self.axis = data["axis"]
+        self.min = data["min"]
+        self.default = data["default"]
+        self.max = data["max"]
+        self.positions = [position for position, _ in data["samples"]]
+        self.curves = {}
+        for _, results in data["samples"]:
+            for path, value in results.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self.curves.setdefault(path, []).append(value)
+        # Only keep metrics measured at every sample
+        self.curves = {path: values for path, values in self.curves.items() if len(values) == len(self.positions)}
+
+    def interpolate(self, path, position):
+        """Estimates the metric `path` at any `position`, clamped to the axis range."""
+        values = self.curves[path]
+        position = min(max(position, self.min), self.max)
+        index = bisect.bisect_left(self.positions, position)
+        if index == len(self.positions):
+            return values[-1]
+        if self.positions[index] == position or index == 0:
+            return values[index]
+        x0, x1 = self.positions[index - 1], self.positions[index]
+        y0, y1 = values[index - 1], values[index]
+        return y0 + (y1 - y0) * (position - x0) / (x1 - x0)
+
+
+def profile_axes(font_path, tolerance=None, max_evaluations=None):
+    """Profiles the variable-aware metrics (e.g. `appearance/weight` or `parametric/XOPQ`)
+    along each `fvar` axis, holding the other axes at their defaults.
+
+    Each axis is sampled at its extremes, its default, its masters and the named instances,
+    and is only refined where a metric deviates from linear interpolation by more than
+    `tolerance` (a positive fraction of that metric's range), worst deviations first. At most
+    `max_evaluations` locations are measured per axis, named instances included, though the
+    extremes, the default and the masters are always measured. Returns a dictionary of
+    `AxisProfile` objects keyed by axis tag; static fonts give an empty dictionary.
+    """
+    return {
+        data["axis"]: AxisProfile(data)
+        for data in rust_profile(font_path, tolerance=tolerance, max_evaluations=max_evaluations)
+    }
+
+
+DEFAULT_CONCURRENCY = os.cpu_count() or 1
+
+# One default limit per event loop, as semaphores can't be shared between loops
+_default_limits = weakref.WeakKeyDictionary()
+
+
+def _default_limit():
+    loop = asyncio.get_running_loop()
+    if loop not in _default_limits:
+        _default_limits[loop] = asyncio.Semaphore(DEFAULT_CONCURRENCY)
+    return _default_limits[loop]
+
+
+def _retrieve(future):
+    # Marks the outcome of a future nobody awaits as seen, so asyncio doesn't complain
+    # about an exception that was never retrieved
+    future.cancelled() or future.exception()
+
+
+def _resolve(future, results, error):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(results)
+
+
+async def quantify_async(
+    font,
+    includes=None,
+    excludes=None,
+    locations=None,
+    debug=False,
+    show=False,
+    primary_script=None,
+    limit=None,
+):
+    """Awaitable version of `quantify()`.
+
+    `font` is a path or the font's contents as `bytes`. The Rust run happens on a native
+    thread pool without holding the GIL, so the event loop keeps running meanwhile.
+
+    `limit` is an `asyncio.Semaphore` bounding how many runs may be in flight at once;
+    by default, runs on the same event loop share a limit of `DEFAULT_CONCURRENCY`.
+    Cancelling the awaiting task stops the Rust run before its next quantifier, and
+    its slot in `limit` is only freed once the run has actually stopped.
+    """
+    if limit is None:
+        limit = _default_limit()
+    await limit.acquire()
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+    done.add_done_callback(lambda _: limit.release())
+
+    def on_done(results, error):
+        # Called from a worker thread
+        try:
+            loop.call_soon_threadsafe(_resolve, done, results, error)
+        except RuntimeError:
+            # The event loop has been closed in the meantime
+            pass
+
+    try:
+        handle = spawn_run(font, on_done)
+    except BaseException:
+        done.cancel()
+        raise
+    try:
+        rust_results = await asyncio.shield(done)
+    except asyncio.CancelledError:
+        handle.cancel()
+        # Nobody awaits `done` any more
+        done.add_done_callback(_retrieve)
+        raise
+    return _merge_results(rust_results, includes, excludes, locations, debug, show, primary_script)
+
+
+async def _iterate(fonts):
+    if hasattr(fonts, "__aiter__"):
+        async for font in fonts:
+            yield font
+    else:
+        for font in fonts:
+            yield font
+
+
+async def quantify_as_completed(fonts, concurrency=DEFAULT_CONCURRENCY, **kwargs):
+    """Quantifies a (sync or async) stream of font paths or `bytes`, yielding
+    `(font, results)` tuples in the order the runs complete.
+
+    At most `concurrency` fonts are taken from the stream and run at the same time.
+    Other keyword arguments are passed on to `quantify_async()`. If a run fails, its
+    exception is raised from the iterator; closing the iterator early cancels the runs
+    still in flight and drops the outcomes of those which finished but weren't yielded yet.
+    """
+    limit = asyncio.Semaphore(concurrency)
+    pending = set()
+    finished = collections.deque()
+
+    async def quantify_one(font):
+        return font, await quantify_async(font, limit=limit, **kwargs)
+
+    async def wait():
+        nonlocal pending
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finished.extend(done)
+
+    try:
+        async for font in _iterate(fonts):
+            while len(pending) >= concurrency:
+                await wait()
+                while finished:
+                    yield finished.popleft().result()
+            pending.add(asyncio.ensure_future(quantify_one(font)))
+        while pending:
+            await wait()
+            while finished:
+                yield finished.popleft().result()
+    finally:
+        for task in pending:
+            task.cancel()
+            task.add_done_callback(_retrieve)
+        for task in finished:
+            _retrieve(task)
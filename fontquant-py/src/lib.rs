@@ -1,10 +1,25 @@
 #![deny(clippy::unwrap_used, clippy::expect_used)]
-use std::collections::BTreeMap;
+use std::{
+    any::Any,
+    collections::BTreeMap,
+    panic::{catch_unwind, AssertUnwindSafe},
+    path::PathBuf,
+    sync::{
+        atomic::{AtomicBool, Ordering},
+        Arc,
+    },
+};
 
-use pyo3::{exceptions::PyRuntimeError, prelude::*, IntoPyObjectExt};
+use pyo3::{
+    exceptions::{PyRuntimeError, PyValueError},
+    panic::PanicException,
+    prelude::*,
+    types::{PyBytes, PyDict, PyList},
+    IntoPyObjectExt,
+};
 use read_fonts::FontRef;
 
-use fontquant_lib::{MetricValue, Results};
+use fontquant_lib::{profile::ProfileSettings, MetricValue, Results};
 
 fn pythonize_metric_value(metric_value: &MetricValue, py: Python<'_>) -> Result<Py<PyAny>, PyErr> {
     match metric_value {
@@ -43,6 +58,49 @@ fn get_parametric<'a>(py: Python<'a>, font_file: &str) -> Result<Bound<'a, PyAny
     pythonize_results(results, py)
 }
 
+/// Profiles the variable-aware metrics along each axis of the font. Returns a list with
+/// one dictionary per axis, holding its range and its samples sorted by position.
+#[pyfunction]
+#[pyo3(signature = (font_file, tolerance=None, max_evaluations=None))]
+fn profile<'a>(
+    py: Python<'a>,
+    font_file: &str,
+    tolerance: Option<f64>,
+    max_evaluations: Option<usize>,
+) -> Result<Bound<'a, PyAny>, PyErr> {
+    let defaults = ProfileSettings::default();
+    let settings = ProfileSettings {
+        tolerance: tolerance.unwrap_or(defaults.tolerance),
+        max_evaluations: max_evaluations.unwrap_or(defaults.max_evaluations),
+        ..defaults
+    };
+    settings
+        .validate()
+        .map_err(|e| PyErr::new::<PyValueError, _>(format!("{e}")))?;
+    let font_file = std::fs::read(font_file)
+        .map_err(|e| PyErr::new::<PyRuntimeError, _>(format!("Failed to read font file: {e}")))?;
+    let font_file = FontRef::new(&font_file)
+        .map_err(|e| PyErr::new::<PyRuntimeError, _>(format!("Failed to parse font file: {e}")))?;
+    let profiles = py
+        .allow_threads(|| fontquant_lib::profile::profile(&font_file, &settings))
+        .map_err(|e| PyErr::new::<PyRuntimeError, _>(format!("{e}")))?;
+    let list = PyList::empty(py);
+    for axis_profile in profiles {
+        let dict = PyDict::new(py);
+        dict.set_item("axis", axis_profile.axis.to_string())?;
+        dict.set_item("min", axis_profile.min)?;
+        dict.set_item("default", axis_profile.default)?;
+        dict.set_item("max", axis_profile.max)?;
+        let samples = PyList::empty(py);
+        for sample in axis_profile.samples {
+            samples.append((sample.position, pythonize_results(sample.results, py)?))?;
+        }
+        dict.set_item("samples", samples)?;
+        list.append(dict)?;
+    }
+    list.into_bound_py_any(py)
+}
+
 #[pyfunction]
 fn run<'a>(py: Python<'a>, font_file: &str) -> Result<Bound<'a, PyAny>, PyErr> {
     let font_file = std::fs::read(font_file)
@@ -54,8 +112,95 @@ fn run<'a>(py: Python<'a>, font_file: &str) -> Result<Bound<'a, PyAny>, PyErr> {
     pythonize_results(results, py)
 }
 
+/// A font to quantify in the background, either a path or the font's contents
+enum FontSource {
+    Path(PathBuf),
+    Bytes(Vec<u8>),
+}
+
+impl FontSource {
+    fn extract(font: &Bound<'_, PyAny>) -> Result<Self, PyErr> {
+        if let Ok(bytes) = font.downcast::<PyBytes>() {
+            Ok(FontSource::Bytes(bytes.as_bytes().to_vec()))
+        } else {
+            Ok(FontSource::Path(font.extract()?))
+        }
+    }
+
+    fn quantify(self, cancelled: &AtomicBool) -> Result<Results, PyErr> {
+        let font_file = match self {
+            FontSource::Path(path) => std::fs::read(path).map_err(|e| {
+                PyErr::new::<PyRuntimeError, _>(format!("Failed to read font file: {e}"))
+            })?,
+            FontSource::Bytes(bytes) => bytes,
+        };
+        let font_file = FontRef::new(&font_file).map_err(|e| {
+            PyErr::new::<PyRuntimeError, _>(format!("Failed to parse font file: {e}"))
+        })?;
+        fontquant_lib::run_cancellable(&font_file, &[], cancelled)
+            .map_err(|e| PyErr::new::<PyRuntimeError, _>(format!("{e}")))
+    }
+}
+
+/// The message a panic was started with, if it had one
+fn panic_message(payload: &(dyn Any + Send)) -> String {
+    if let Some(message) = payload.downcast_ref::<&str>() {
+        message.to_string()
+    } else if let Some(message) = payload.downcast_ref::<String>() {
+        message.clone()
+    } else {
+        "fontquant panicked".to_string()
+    }
+}
+
+/// Handle on a run started by `spawn_run`
+#[pyclass]
+struct RunHandle {
+    cancelled: Arc<AtomicBool>,
+}
+
+#[pymethods]
+impl RunHandle {
+    /// Asks the run to stop before its next quantifier. `on_done` is still called.
+    fn cancel(&self) {
+        self.cancelled.store(true, Ordering::Relaxed);
+    }
+}
+
+/// Quantifies `font` (a path or `bytes`) on the native thread pool without holding the GIL.
+///
+/// When the run is over, `on_done(results, None)` or `on_done(None, exception)` is called
+/// from the worker thread, so it must hand the outcome over to its event loop itself.
+#[pyfunction]
+fn spawn_run(font: &Bound<'_, PyAny>, on_done: Py<PyAny>) -> Result<RunHandle, PyErr> {
+    let source = FontSource::extract(font)?;
+    let cancelled = Arc::new(AtomicBool::new(false));
+    let handle = RunHandle {
+        cancelled: cancelled.clone(),
+    };
+    rayon::spawn(move || {
+        // A panic would abort the whole process from the thread pool, and `on_done` would
+        // never be called; hand it over as the `PanicException` a blocking `run` raises
+        let outcome = catch_unwind(AssertUnwindSafe(|| source.quantify(&cancelled)))
+            .unwrap_or_else(|payload| Err(PanicException::new_err(panic_message(&*payload))));
+        Python::with_gil(|py| {
+            let called = match outcome.and_then(|results| pythonize_results(results, py)) {
+                Ok(results) => on_done.call1(py, (results, py.None())),
+                Err(e) => on_done.call1(py, (py.None(), e.into_value(py))),
+            };
+            if let Err(e) = called {
+                e.write_unraisable(py, None);
+            }
+        });
+    });
+    Ok(handle)
+}
+
 #[pymodule(name = "_fontquant")]
 fn fontquant(m: &Bound<'_, PyModule>) -> PyResult<()> {
+    m.add_class::<RunHandle>()?;
     m.add_function(wrap_pyfunction!(get_parametric, m)?)?;
-    m.add_function(wrap_pyfunction!(run, m)?)
+    m.add_function(wrap_pyfunction!(profile, m)?)?;
+    m.add_function(wrap_pyfunction!(run, m)?)?;
+    m.add_function(wrap_pyfunction!(spawn_run, m)?)
 }
@@ -72,7 +72,7 @@ fn metric_value_to_json(mv: &MetricValue) -> Value {
 fn results_to_json(results: &Results) -> Value {
     let mut map = Map::new();
     for (name, (_key, value)) in results.iter() {
-        map.insert(name.clone(), metric_value_to_json(value));
+        map.insert(name.to_string(), metric_value_to_json(value));
     }
     Value::Object(map)
 }
@@ -1,5 +1,9 @@
+import asyncio
+import gc
 import os
-from fontquant import quantify
+import threading
+import fontquant
+from fontquant import profile_axes, quantify, quantify_as_completed, quantify_async
 import pytest
 
 
@@ -309,3 +313,168 @@ def test_variable():
             }
         }
     )
+
+
+def test_quantify_async():
+    font_path = get_font_path("YoungSerif-Regular.ttf")
+    with open(font_path, "rb") as font_file:
+        font_bytes = font_file.read()
+
+    async def main():
+        return await asyncio.gather(
+            quantify_async(font_path, includes=["numerals"]),
+            quantify_async(font_bytes, includes=["numerals"]),
+        )
+
+    from_path, from_bytes = asyncio.run(main())
+    assert from_path == from_bytes == quantify(font_path, includes=["numerals"])
+
+
+def test_quantify_as_completed():
+    fonts = [get_font_path("YoungSerif-Regular.ttf"), get_font_path("UnicaOne-Regular.ttf")]
+
+    async def main():
+        return {font: results async for font, results in quantify_as_completed(fonts, concurrency=1)}
+
+    results = asyncio.run(main())
+    assert results == {font: quantify(font) for font in fonts}
+
+
+def test_quantify_async_cancel(monkeypatch, caplog):
+    class Handle:
+        def __init__(self):
+            self.cancelled = threading.Event()
+
+        def cancel(self):
+            self.cancelled.set()
+
+    workers = []
+
+    def spawn_run(font, on_done):
+        # Stands in for a long Rust run which only stops once cancelled
+        handle = Handle()
+
+        def work():
+            handle.cancelled.wait(timeout=5)
+            on_done(None, RuntimeError("the run was cancelled"))
+
+        workers.append(threading.Thread(target=work))
+        workers[-1].start()
+        return handle
+
+    monkeypatch.setattr(fontquant, "spawn_run", spawn_run)
+
+    async def main():
+        limit = asyncio.Semaphore(1)
+        task = asyncio.ensure_future(quantify_async(get_font_path("YoungSerif-Regular.ttf"), limit=limit))
+        while not workers:
+            await asyncio.sleep(0.01)
+        assert limit.locked()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The slot comes back once the run has stopped
+        await asyncio.wait_for(limit.acquire(), timeout=5)
+        limit.release()
+
+    asyncio.run(main())
+    for worker in workers:
+        worker.join()
+    gc.collect()
+    assert "exception was never retrieved" not in caplog.text
+
+
+def test_quantify_async_panic(monkeypatch):
+    # Like pyo3's PanicException, which derives from BaseException
+    class PanicException(BaseException):
+        pass
+
+    workers = []
+
+    def spawn_run(font, on_done):
+        # Stands in for a Rust run which panics on a broken font
+        workers.append(threading.Thread(target=on_done, args=(None, PanicException("index out of bounds"))))
+        workers[-1].start()
+        return None
+
+    monkeypatch.setattr(fontquant, "spawn_run", spawn_run)
+
+    async def main():
+        limit = asyncio.Semaphore(1)
+        with pytest.raises(PanicException, match="index out of bounds"):
+            await asyncio.wait_for(quantify_async(get_font_path("YoungSerif-Regular.ttf"), limit=limit), timeout=5)
+        assert not limit.locked()
+
+    asyncio.run(main())
+    for worker in workers:
+        worker.join()
+
+
+def test_quantify_as_completed_concurrency(monkeypatch):
+    lock = threading.Lock()
+    running = 0
+    most_running = 0
+    rust_spawn_run = fontquant.spawn_run
+
+    def spawn_run(font, on_done):
+        nonlocal running, most_running
+        with lock:
+            running += 1
+            most_running = max(most_running, running)
+
+        def finished(results, error):
+            nonlocal running
+            with lock:
+                running -= 1
+            on_done(results, error)
+
+        return rust_spawn_run(font, finished)
+
+    monkeypatch.setattr(fontquant, "spawn_run", spawn_run)
+    fonts = [get_font_path("YoungSerif-Regular.ttf"), get_font_path("UnicaOne-Regular.ttf")] * 3
+
+    async def main():
+        return [font async for font, _ in quantify_as_completed(fonts, concurrency=2)]
+
+    assert sorted(asyncio.run(main())) == sorted(fonts)
+    assert 1 <= most_running <= 2
+
+
+def test_quantify_as_completed_failures(monkeypatch, caplog):
+    class Handle:
+        def cancel(self):
+            pass
+
+    def spawn_run(font, on_done):
+        on_done(None, RuntimeError(f"Failed to parse font file: {font}"))
+        return Handle()
+
+    monkeypatch.setattr(fontquant, "spawn_run", spawn_run)
+
+    async def main():
+        async for _ in quantify_as_completed(["a.ttf", "b.ttf", "c.ttf"], concurrency=3):
+            pass
+
+    with pytest.raises(RuntimeError, match="Failed to parse font file"):
+        asyncio.run(main())
+    gc.collect()
+    # The runs which failed too but weren't yielded had their outcome retrieved
+    assert "exception was never retrieved" not in caplog.text
+
+
+def test_profile_axes():
+    profiles = profile_axes(get_font_path("Foldit-VariableFont_wght.ttf"))
+    assert list(profiles) == ["wght"]
+    wght = profiles["wght"]
+    assert wght.positions == sorted(wght.positions)
+    assert 100.0 in wght.positions and 900.0 in wght.positions
+    weight = wght.curves["appearance/weight"]
+    assert weight[-1] > weight[0]
+    assert wght.interpolate("appearance/weight", 900.0) == weight[-1]
+    assert weight[0] <= wght.interpolate("appearance/weight", 150.0) <= weight[wght.positions.index(200.0)]
+
+    assert profile_axes(get_font_path("YoungSerif-Regular.ttf")) == {}
+
+    for tolerance in [0.0, -0.01, float("nan")]:
+        with pytest.raises(ValueError):
+            profile_axes(get_font_path("Foldit-VariableFont_wght.ttf"), tolerance=tolerance)